@@ -6,6 +6,7 @@ from typing import Type
 import pygame
 import pygame._sdl2 as sdl2
 
+from . import assets
 from .gfx import GFX
 from .state_machine import StateMachine, StateOperations, BasicState
 
@@ -86,6 +87,10 @@ class App[S: AppState](StateMachine[S]):
     USE_FPS_TITLE = False
     WINDOW_KWARGS = {}
     GFX_CLASS = GFX
+    PRELOAD_IMAGES: list[str] = []
+    """Images loaded in the background as soon as the window is created."""
+    PRELOAD_REGISTERED_IMAGES = False
+    """Also preload every image used by an assets.Image or assets.SpriteSheet created so far."""
 
     MAIN_APP: "App" = None  # type: ignore
 
@@ -100,27 +105,45 @@ class App[S: AppState](StateMachine[S]):
         )
         self.gfx = self.GFX_CLASS(self.window.get_surface())
 
+        if self.PRELOAD_IMAGES:
+            assets.preload(self.PRELOAD_IMAGES)
+        if self.PRELOAD_REGISTERED_IMAGES:
+            assets.preload()
+
         pygame.mouse.set_visible(self.MOUSE_VISIBLE)
 
+        # Events that the app handles itself, by event type.
+        self._event_handlers = {
+            pygame.QUIT: self._on_quit,
+            pygame.VIDEORESIZE: self._on_resize,
+        }
+
         super().__init__(self.INITIAL_STATE)
 
     def run(self):
         """The main loop of the app."""
         pygame.init()
 
+        # Local names for what doesn't change during the loop.
+        # self.gfx and self.state do change, so they are not cached.
+        stack = self.stack
+        clock = self.clock
+        window = self.window
+
         frame = 0
         start = time()
         while self.state is not None:  # Equivalent to self.running
             self.handle_events()
-            for state in self.stack[:-1]:
-                state.paused_logic()
+            for i in range(len(stack) - 1):
+                stack[i].paused_logic()
             self.logic()
             self.draw()
-            self.window.flip()
+            self.gfx.flush()
+            window.flip()
 
-            self.clock.tick(self.state.FPS)
+            clock.tick(self.state.FPS)
             if self.USE_FPS_TITLE:
-                pygame.display.set_caption(f"{self.NAME} - {self.clock.get_fps():.1f} FPS")
+                pygame.display.set_caption(f"{self.NAME} - {clock.get_fps():.1f} FPS")
 
             frame += 1
             self.go_to_next_state()
@@ -143,23 +166,28 @@ class App[S: AppState](StateMachine[S]):
 
         Return True if the event was handled and should not be propagated.
         """
-        if event.type == pygame.QUIT:
-            self.quit()
-            return True
-        elif event.type == pygame.VIDEORESIZE:
-            old = self.window.size
-            self.window.size = event.size
-            self.gfx = self.GFX_CLASS(self.window.get_surface())
-            new = self.window.size
-            if old != new and self.state is not None:
-                self.state.resize(old, new)
-
-            # We want this event to propagate to the state
-            return False
+        handler = self._event_handlers.get(event.type)
+        if handler is not None:
+            return handler(event)
         elif self.state is not None:
             return self.state.handle_event(event)
         return False
 
+    def _on_quit(self, event) -> bool:
+        self.quit()
+        return True
+
+    def _on_resize(self, event) -> bool:
+        old = self.window.size
+        self.window.size = event.size
+        self.gfx.rebind(self.window.get_surface())
+        new = self.window.size
+        if old != new and self.state is not None:
+            self.state.resize(old, new)
+
+        # We want this event to propagate to the state
+        return False
+
     def handle_events(self):
 
         events = []
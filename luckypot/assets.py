@@ -1,5 +1,9 @@
 import itertools
 import json
+import marshal
+import os
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
 from bisect import bisect_left, bisect_right
 from functools import lru_cache
 from pathlib import Path
@@ -17,12 +21,15 @@ __all__ = [
     "sound",
     "play",
     "image",
+    "preload",
     "rotate",
     "scale",
     "font",
     "text",
     "colored_text",
     "wrapped_text",
+    "animation_data",
+    "bake_animations",
     "tilemap",
     "Image",
     "SpriteSheet",
@@ -42,13 +49,35 @@ MUSIC = "music"
 
 def set_assets_dir(path: Path):
     """Set the path to the assets directory. This needs to be called before using any asset."""
-    global ASSETS_DIR
+    global ASSETS_DIR, _SFX_DIR, _IMAGES_DIR, _FONTS_DIR
     ASSETS_DIR = path
+    _SFX_DIR = os.path.join(path, SFX)
+    _IMAGES_DIR = os.path.join(path, IMAGES)
+    _FONTS_DIR = os.path.join(path, FONTS)
 
-@lru_cache()
-def sound(name):
+
+# Same as ASSETS_DIR / SFX ..., but plain strings are cheaper to join than Paths.
+_SFX_DIR = _IMAGES_DIR = _FONTS_DIR = ""
+
+
+class _AssetCache(dict):
+    """Loads missing keys with the given function.
+
+    Assets are never evicted, so this is enough and a hit is cheaper than with lru_cache.
+    """
+
+    def __init__(self, load):
+        super().__init__()
+        self.load = load
+
+    def __missing__(self, key):
+        value = self[key] = self.load(key)
+        return value
+
+
+def _load_sound(name):
     assert ASSETS_DIR, "You need to call assets.set_assets_dir() before."
-    file = ASSETS_DIR / SFX / (name + ".wav")
+    file = os.path.join(_SFX_DIR, name + ".wav")
     sound = pygame.mixer.Sound(file)
 
     sound.set_volume(VOLUMES.get(name, 1.0) * 0.1)
@@ -56,6 +85,11 @@ def sound(name):
     return sound
 
 
+_SOUND_CACHE: dict[str, pygame.mixer.Sound] = _AssetCache(_load_sound)
+# sound(name) is directly the lookup in the cache.
+sound = _SOUND_CACHE.__getitem__
+
+
 def play(name: str):
     if not settings.mute:
         s = sound(name)
@@ -63,39 +97,143 @@ def play(name: str):
         s.play()
 
 
-@lru_cache()
-def image(name: str):
+_PRELOADER: ThreadPoolExecutor | None = None
+# Images being loaded by the preloader, so that image() waits instead of loading them twice.
+_PENDING: dict[str, Future] = {}
+# Names of all the Image and SpriteSheet objects created.
+_REGISTERED_IMAGES: set[str] = set()
+
+
+def preload(names: list[str] | None = None) -> list[Future]:
+    """Load images in background threads, so that they are ready when first used.
+
+    pygame releases the GIL while decoding images, so this doesn't slow the game down.
+    Best called once the window exists, so that images are converted to its format.
+    If no names are given, all the images used by Image and SpriteSheet objects are loaded.
+    """
+    global _PRELOADER
+    if _PRELOADER is None:
+        _PRELOADER = ThreadPoolExecutor(max_workers=2, thread_name_prefix="preload")
+    if names is None:
+        names = list(_REGISTERED_IMAGES)
+
+    futures = []
+    for name in names:
+        future = _PENDING.get(name)
+        if future is None:
+            if name in _IMAGE_CACHE:
+                future = _done(_IMAGE_CACHE[name])
+            else:
+                # The cache is filled directly, as image() would wait on this very future.
+                future = _PENDING[name] = _PRELOADER.submit(_IMAGE_CACHE.__getitem__, name)
+                # Once loaded, the image is in the cache and the future is not needed anymore.
+                future.add_done_callback(lambda _, name=name: _PENDING.pop(name, None))
+        futures.append(future)
+    return futures
+
+
+def _done(result) -> Future:
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def _load_image(name: str):
     assert ASSETS_DIR, "You need to call assets.set_assets_dir() before."
-    file = ASSETS_DIR / IMAGES / (name + ".png")
+    file = os.path.join(_IMAGES_DIR, name + ".png")
     print(f"Load {file}")
     img = pygame.image.load(file)
 
     if name.startswith("planet"):
-        return overlay(img, (0, 0, 0, 100))
+        img = overlay(img, (0, 0, 0, 100))
+    return _convert(name, img)
+
+
+# Names of the images loaded before the window existed, see Image.load().
+_UNCONVERTED: set[str] = set()
+
+
+def _convert(name: str, img: pygame.Surface) -> pygame.Surface:
+    """Match the display format once, instead of converting on every blit."""
+    try:
+        if img.get_masks()[3] or img.get_colorkey() is not None:
+            img = img.convert_alpha()
+        else:
+            img = img.convert()  # Opaque images blit faster without alpha.
+    except pygame.error:
+        _UNCONVERTED.add(name)  # No window yet, keep the file's format.
+    else:
+        _UNCONVERTED.discard(name)
+    return img
+
+
+_IMAGE_CACHE: dict[str, pygame.Surface] = _AssetCache(_load_image)
+
+
+def image(name: str) -> pygame.Surface:
+    """Load an image from the images folder, only once. Waits for it if it is being preloaded."""
+    img = _IMAGE_CACHE.get(name)
+    if img is None:
+        pending = _PENDING.get(name)
+        img = pending.result() if pending is not None else _IMAGE_CACHE[name]
     return img
 
 
-@lru_cache(10000)
 def rotate(image, degrees):
+    """Rotated copy of the image, cached. The angle is rounded to the nearest degree."""
+    return _rotate(image, round(degrees) % 360)
+
+
+@lru_cache(10000)
+def _rotate(image, degrees: int):
     return pygame.transform.rotate(image, degrees)
 
 
-@lru_cache(1000)
+# Non integer scaling factors are rounded to a multiple of 1/SCALE_STEPS.
+SCALE_STEPS = 16
+
+
+# Keyed by id() and not by the surface itself, so that the cache does not keep
+# the source images alive. Entries are evicted when their source is collected.
+_SCALE_CACHE: dict[tuple[int, float], pygame.Surface] = {}
+
+
 def scale(image, factor):
-    if not isinstance(factor, int):
+    if factor == int(factor):
+        factor = int(factor)
+    else:
+        factor = round(factor * SCALE_STEPS) / SCALE_STEPS
+    key = (id(image), factor)
+    scaled = _SCALE_CACHE.get(key)
+    if scaled is not None:
+        return scaled
+
+    if isinstance(factor, int):
+        scaled = pygame.transform.scale_by(image, factor)
+    else:
         print(f"Warning: scaling {image} by non integer factor {factor}.")
-    size = int(factor * image.get_width()), int(factor * image.get_height())
-    return pygame.transform.scale(image, size)
+        size = int(factor * image.get_width()), int(factor * image.get_height())
+        scaled = pygame.transform.scale(image, size)
 
+    _SCALE_CACHE[key] = scaled
+    weakref.finalize(image, _SCALE_CACHE.pop, key, None)
+    return scaled
 
-@lru_cache()
-def font(size: int, name: str | None = None):
+
+def _load_font(key: tuple[int, str | None]):
     assert ASSETS_DIR, "You need to call assets.set_assets_dir() before."
-    name = name or BIG_FONT
-    file = ASSETS_DIR / FONTS / (name + ".ttf")
+    size, name = key
+    file = os.path.join(_FONTS_DIR, (name or BIG_FONT) + ".ttf")
     return pygame.font.Font(file, size)
 
 
+_FONT_CACHE: dict[tuple[int, str | None], pygame.font.Font] = _AssetCache(_load_font)
+
+
+def font(size: int, name: str | None = None):
+    return _FONT_CACHE[size, name]
+
+
 @lru_cache(10000)
 def text(txt, size, color, font_name=None):
     antialias = ANTIALIASING_ALIAS.get(font_name or BIG_FONT, True)
@@ -111,15 +249,26 @@ def colored_text(size, *parts, name=None):
 
     w = sum(s.get_width() for s in surfaces)
     h = max(s.get_height() for s in surfaces)
-    output = pygame.Surface((w, h))
-    output.set_colorkey((0, 0, 0))
+    # Per pixel alpha instead of a colorkey, which also keeps the antialiased edges.
+    output = pygame.Surface((w, h), pygame.SRCALPHA)
+    output.fill((0, 0, 0, 0))
 
+    pairs = []
     x = 0
     for surf in surfaces:
-        output.blit(surf, (x, 0))
+        pairs.append((surf, (x, 0)))
         x += surf.get_width()
+    output.blits(pairs, doreturn=0)
 
-    return output
+    try:
+        return output.convert_alpha()
+    except pygame.error:
+        return output  # No window yet.
+
+
+@lru_cache(10000)
+def _word_width(f: pygame.font.Font, word: str) -> int:
+    return f.size(word)[0]
 
 
 @lru_cache()
@@ -127,16 +276,28 @@ def wrapped_text(txt: str, size, color, max_width, name=None, align_right=False)
     f = font(size, name)
 
     words = txt.split()
+    space = f.size(" ")[0]
+    # Width of the first i+1 words, each followed by a space.
+    ends = list(itertools.accumulate(_word_width(f, word) + space for word in words))
+
+    def fits(start, end):
+        return f.size(" ".join(words[start:end]))[0] < max_width
+
     surfaces = []
-    while words:
-        line = []
-        while f.size(" ".join(line))[0] < max_width:
-            if not words:
-                break
-            line.append(words.pop(0))
-        else:
-            words.insert(0, line.pop())
-        surfaces.append(text(" ".join(line), size, color, name))
+    start = 0
+    while start < len(words):
+        # Guess where the line ends from the word widths, then fix the guess, as
+        # kerning makes the width of a line slightly different from the sum of its words.
+        line_start = ends[start - 1] if start else 0
+        end = bisect_left(ends, line_start + max_width + space, start)
+        end = max(end, start + 1)
+        while end > start + 1 and not fits(start, end):
+            end -= 1
+        while end < len(words) and fits(start, end + 1):
+            end += 1
+
+        surfaces.append(text(" ".join(words[start:end]), size, color, name))
+        start = end
 
     w = max(s.get_width() for s in surfaces)
     h = sum(s.get_height() for s in surfaces)
@@ -144,17 +305,52 @@ def wrapped_text(txt: str, size, color, max_width, name=None, align_right=False)
     output = pygame.Surface((w, h), pygame.SRCALPHA)
     output.fill((0, 0, 0, 0))
 
+    pairs = []
     y = 0
     for surf in surfaces:
         if align_right:
-            output.blit(surf, surf.get_rect(topright=(w, y)))
+            pairs.append((surf, surf.get_rect(topright=(w, y))))
         else:
-            output.blit(surf, surf.get_rect(midtop=(w / 2, y)))
+            pairs.append((surf, surf.get_rect(midtop=(w / 2, y))))
         y += surf.get_height()
+    output.blits(pairs, doreturn=0)
 
     return output
 
 
+# Bumped whenever the layout of the baked files changes, so that old ones are ignored.
+_BAKED_VERSION = 1
+
+
+@lru_cache()
+def animation_data(name: str) -> dict:
+    """Parsed json description of an animation. Shared between all instances, don't modify it.
+
+    If bake_animations() was run, the baked version is used, as long as it is up to date.
+    """
+    assert ASSETS_DIR, "You need to call assets.set_assets_dir() before."
+    file = ASSETS_DIR / ANIMATIONS / (name + ".json")
+    baked = file.with_suffix(".baked")
+    if baked.exists() and baked.stat().st_mtime >= file.stat().st_mtime:
+        # marshal only builds plain values and never runs code, unlike pickle.
+        try:
+            version, data = marshal.loads(baked.read_bytes())
+        except (ValueError, EOFError, TypeError):
+            pass  # Corrupted, or written by another python version.
+        else:
+            if version == _BAKED_VERSION and isinstance(data, dict):
+                return data
+    return json.loads(file.read_text())
+
+
+def bake_animations():
+    """Write a .baked file next to each animation json, which is faster to load than the json."""
+    assert ASSETS_DIR, "You need to call assets.set_assets_dir() before."
+    for file in (ASSETS_DIR / ANIMATIONS).glob("*.json"):
+        data = json.loads(file.read_text())
+        file.with_suffix(".baked").write_bytes(marshal.dumps((_BAKED_VERSION, data)))
+
+
 @lru_cache()
 def tilemap(name, x, y, tile_size=32):
     img = image(name)
@@ -173,11 +369,15 @@ class Image:
     def __init__(self, name):
         self.name = name
         self.surface: Optional[pygame.Surface] = None
+        _REGISTERED_IMAGES.add(name)
 
     def load(self):
         """Load the image from disk if needed."""
         if self.surface is None:
             self.surface = image(self.name)
+        elif self.name in _UNCONVERTED:
+            # Loaded before the window was created, we can now convert it.
+            self.surface = _IMAGE_CACHE[self.name] = _convert(self.name, self.surface)
 
     def __call__(self, *args, **kwargs):
         self.load()
@@ -189,19 +389,41 @@ class SpriteSheet(Image):
     def __init__(self, name, tile_size, auto_crop=False):
         super().__init__(name)
         self.tile_size = tile_size
+        # All the tiles, row by row, built on first use.
+        self._grid: list[pygame.Surface] | None = None
+        self._cols = 0
+
+    def load(self):
+        surface = self.surface
+        super().load()
+        if self.surface is not surface:
+            self._grid = None
+
+    def preload_all(self):
+        """Cut the spritesheet in tiles now, instead of on the first call."""
+        self.load()
+        s = self.tile_size
+        self._cols = self.surface.get_width() // s
+        rows = self.surface.get_height() // s
+        self._grid = [
+            self.surface.subsurface((col * s, row * s, s, s))
+            for row in range(rows)
+            for col in range(self._cols)
+        ]
 
     def __call__(self, col, row=0):
         """Return the image at the (col, row) position on the spritesheet"""
 
         self.load()
+        if self._grid is None:
+            self.preload_all()
 
-        # Wrap column when bigger than line length
-        tiles_in_a_row = self.surface.get_width() // self.tile_size
-        row += col // tiles_in_a_row
-        col %= tiles_in_a_row
-
-        return self.surface.subsurface(
-            (col * self.tile_size, row * self.tile_size, self.tile_size, self.tile_size))
+        # Columns bigger than the line length wrap to the next lines.
+        index = row * self._cols + col
+        # Without this, negative indices would silently pick tiles from the end.
+        if not 0 <= index < len(self._grid):
+            raise ValueError("subsurface rectangle outside surface area")
+        return self._grid[index]
 
 
 class Assets:
@@ -230,15 +452,18 @@ class AnimationV2:
         self.timer = 0
         self.name = name
 
-        assert ASSETS_DIR, "You need to call assets.set_assets_dir() before."
-        data = ASSETS_DIR / ANIMATIONS / (self.name + ".json")
-        data = json.loads(data.read_text())
+        data = animation_data(self.name)
 
         self.tile_size = data["tile_size"]
         self.frame_nb = data["length"]
         self.frame_duration = override_frame_duration or data["duration"]
         self.flip_x = flip_x
 
+        self.frames = tuple(
+            pygame.transform.flip(tilemap(name, i, 0, self.tile_size), flip_x, False)
+            for i in range(self.frame_nb)
+        )
+
     def __len__(self):
         """Number of frames for one full loop."""
         return self.frame_nb * self.frame_duration
@@ -247,17 +472,30 @@ class AnimationV2:
         self.timer += 1
 
     def image(self):
-        time = self.timer % len(self)
-        frame_nb = time // self.frame_duration
-        return tilemap(self.name, frame_nb, 0, self.tile_size)
+        return self.frames[self.timer // self.frame_duration % self.frame_nb]
 
 
 class Animation:
+    __slots__ = (
+        "name",
+        "anim",
+        "timer",
+        "tile_sheet",
+        "tile_x",
+        "tile_y",
+        "line",
+        "length",
+        "durations",
+        "cum_duration",
+        "flip",
+        "flip_x",
+        "_frame_surfaces",
+    )
+
     def __init__(self, name: str, flip_x=False):
         assert ASSETS_DIR, "You need to call assets.set_assets_dir() before using animations."
         self.name, self.anim = name.split()
-        data = ASSETS_DIR / "animations" / (self.name + ".json")
-        data = json.loads(data.read_text())
+        data = animation_data(self.name)
         self.timer = 0
         self.tile_sheet = data["tile_sheet"]
         self.tile_x = data["tile_x"]
@@ -271,6 +509,14 @@ class Animation:
         self.flip = data["anims"][self.anim].get("flip", False)
         self.flip_x = flip_x
 
+        # The image for each tick of a loop, so that .image() is a single lookup.
+        self._frame_surfaces = [
+            self._image(
+                self.tile_sheet, self._frame_at(t), self.line, self.tile_x, self.tile_y, self.flip_x
+            )
+            for t in range(len(self))
+        ]
+
     def __len__(self):
         """Number of frames for one full loop."""
         if self.flip:
@@ -280,16 +526,15 @@ class Animation:
     def update(self):
         self.timer += 1
 
-    def image(self):
-        time = self.timer % len(self)
+    def _frame_at(self, time):
+        """Index of the frame shown at the given time in the loop."""
         if self.flip and time >= self.cum_duration[-1]:
             time = self.cum_duration[-1] + self.cum_duration[-2] - time - 1
         # Find the index where the time should go
-        frame = bisect_right(self.cum_duration, time)
+        return bisect_right(self.cum_duration, time)
 
-        return self._image(
-            self.tile_sheet, frame, self.line, self.tile_x, self.tile_y, self.flip_x
-        )
+    def image(self):
+        return self._frame_surfaces[self.timer % len(self._frame_surfaces)]
 
     @staticmethod
     @lru_cache()
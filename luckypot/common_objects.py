@@ -1,3 +1,4 @@
+from functools import lru_cache
 from math import ceil
 import pygame
 
@@ -9,6 +10,31 @@ from .utils import auto_crop
 __all__ = ["HealthBar"]
 
 
+@lru_cache(512)
+def _hp_label(hp: int):
+    return auto_crop(text(str(hp), 8, WHITE, SMALL_FONT))
+
+
+@lru_cache(4096)
+def _bar_surface(size: tuple[int, int], color, empty_color, width: int, flash: int):
+    """The fills of the bar, shared between all health bars that show the same thing.
+
+    The surface is wider than the bar when the life or the flash goes past it.
+    """
+    w, h = size
+    surf = pygame.Surface((max(w, width + flash), h), pygame.SRCALPHA)
+
+    surf.fill(color, (0, 0, width, h))
+    if flash > 0:
+        surf.fill(WHITE + (color[3], ), (width, 0, flash, h))
+
+    lost = w - width - flash
+    if lost > 0:
+        surf.fill(empty_color, (width + flash, 0, lost, h))
+
+    return surf
+
+
 class HealthBar(Object):
     """
     A generic health bar that flashes when loosing health.
@@ -49,26 +75,21 @@ class HealthBar(Object):
 
     def draw(self, gfx: "GFX"):
         prop = self.entity.life / self.entity.max_life
-        width = ceil(self.size.x * prop)
-        flash = ceil(self.size.x * self.flash_size / self.entity.max_life)
-        lost = self.size.x - width - flash
-
-        x, y = self.pos
-        gfx.box(self.color, (*self.pos, width, self.size.y))
-        if flash > 0:
-            gfx.box(WHITE + (self.color.a, ), (x + width, y, flash, self.size.y))
-
-        if lost > 0:
-            gfx.box(
-                self.empty_color,
-                (
-                    x + width + flash,
-                    y,
-                    lost,
-                    self.size.y,
-                ),
-            )
-
+        # Clamped, as negative life or flash would move the other fills around.
+        width = max(0, ceil(self.size.x * prop))
+        flash = max(0, ceil(self.size.x * self.flash_size / self.entity.max_life))
+
+        surf = _bar_surface(
+            (int(self.size.x), int(self.size.y)),
+            tuple(self.color),
+            tuple(self.empty_color),
+            width,
+            flash,
+        )
+        gfx.blit_at(surf, "topleft", self.pos)
+
+        # Not part of the cached surface, as the label can be larger than the bar.
         if self.show_hp:
-            t = auto_crop(text(str(int(self.entity.life)), 8, WHITE, SMALL_FONT))
-            gfx.blit(t, midleft=self.rect.midleft + pygame.Vector2(2, 0))
+            x, y = self.pos
+            t = _hp_label(int(self.entity.life))
+            gfx.blit_at(t, "midleft", (x + 2, y + self.size.y / 2))
@@ -1,5 +1,8 @@
+from collections import deque
+from functools import lru_cache
 from time import time, sleep
 
+import pygame
 from pygame import Vector2, K_F11, K_MINUS
 
 from .pygame_input import Button, JoyButton
@@ -9,6 +12,21 @@ from .object import Object
 __all__ = ["Debug"]
 
 
+@lru_cache(100)
+def _point_surface(color: tuple):
+    # Same pixels as gfx.circle(color, pos, 1), but can be queued with all the other blits.
+    # Blitted with its center on the point, the middle pixel lands where the circle is centered.
+    surf = pygame.Surface((3, 3), pygame.SRCALPHA)
+    if color[3] < 255:
+        # gfxdraw.filled_circle() draws a cross.
+        for pos in ((1, 0), (0, 1), (1, 1), (2, 1), (1, 2)):
+            surf.set_at(pos, color)
+    else:
+        # draw.circle() draws a square, above and left of the center.
+        surf.fill(color, (0, 0, 2, 2))
+    return surf
+
+
 class Debug(Object):
     """
     Class that handles the delayed drawing of points, rects, and texts.
@@ -45,10 +63,10 @@ class Debug(Object):
         self.paused = False
         self.slow_motion = False
 
-        self.frame_times = [0]
+        self.frame_times = deque([0], maxlen=30)
 
     def logic(self):
-        self.frame_times = self.frame_times[-29:] + [time()]
+        self.frame_times.append(time())
 
         if self.enabled and self.slow_motion:
             sleep(0.1)
@@ -136,14 +154,18 @@ class Debug(Object):
             # Otherwise, we will have to extend it.
             self.points, self.vectors, self.rects, self.texts = self.lasts
 
+        blit_at = gfx.blit_at
         for x, y, color in self.points:
-            gfx.circle(color, (x, y), 1)
+            color = tuple(pygame.Color(color))
+            blit_at(_point_surface(color), "center", (x, y))
 
+        line = gfx.line
         for anchor, vec, color in self.vectors:
-            gfx.line(color, anchor, anchor + vec)
+            line(color, anchor, anchor + vec)
 
-        for rect, color in self.rects:
-            gfx.rect(color, *rect, width=1)
+        rect = gfx.rect
+        for r, color in self.rects:
+            rect(color, *r, width=1)
 
         y = 3
         for i, obj in enumerate(self.texts):
@@ -1,7 +1,7 @@
 from pathlib import Path
 
-from collections import defaultdict
-from math import cos, pi, sin
+from functools import lru_cache
+from math import cos, pi, radians, sin
 from random import gauss, randrange, uniform
 
 import pygame
@@ -62,7 +62,50 @@ class Sunset(State):
         self.add(Bird((0.6 * W - 18, 30), True))
         self.add(Boids())
 
-    def draw_sun(self, radius=50, top=SUN_TOP, bottom=SUN_BOTTOM, alpha=255):
+        # The suns never change, no need to redraw them every frame.
+        self.sun = self.draw_sun(54)
+        self.second_sun = self.draw_sun(4 * 9, SUN_TOP, SUN_TOP)
+
+        self.sky = pygame.Surface((W, H // 2))
+        for y in range(0, H // 2, band_height):
+            color = utils.mix(SKY_TOP, SKY_END, y / H * 2)
+            self.sky.fill(color, (0, y, W, band_height))
+
+        # The vertical lines of the ground don't move.
+        second_half = pygame.Rect(0, H / 2, W, H / 2)
+        self.vertical_lines = []
+        n_lines = 17
+        for n in range(n_lines):
+            n = utils.chrange(n, (0, n_lines - 1), (-pi / 2, pi / 2))
+            angle = utils.chrange(sin(n), (-1, 1), (0, pi))
+
+            x = infinity[0] + 1000 * cos(angle)
+            y = infinity[1] + 1000 * sin(angle)
+
+            line = second_half.clipline(x, y, *infinity)
+            if line:
+                self.vertical_lines.append(line)
+
+        margin = 30
+        self.menu_rect = pygame.Rect(W / 2 + margin, margin, W / 2 - 2 * margin, H - margin * 2)
+        self.menu_rect.midright = W - margin, H / 2
+        self.menu = pygame.Surface(self.menu_rect.size, pygame.SRCALPHA)
+        self.menu.fill((0, 0, 0, 125))
+        pygame.draw.rect(
+            self.menu, utils.mix(SUN_TOP, SUN_BOTTOM, 0.5), self.menu.get_rect(), 1
+        )
+
+        self.signature = assets.image("ByCozyFractal").copy()
+        self.signature.fill(LINES, special_flags=pygame.BLEND_ADD)
+        sig_rect = self.signature.get_rect(bottomleft=(4, H - 2))
+        self.signature_bg_rect = sig_rect.inflate(8, 4)
+        self.signature_bg = pygame.Surface(self.signature_bg_rect.size, pygame.SRCALPHA)
+        self.signature_bg.fill(BG_COLOR + (200,))
+
+    @staticmethod
+    @lru_cache(16)
+    def draw_sun(radius=50, top=SUN_TOP, bottom=SUN_BOTTOM, alpha=255):
+        """Surface of a sun with horizontal bands. It is shared, don't modify it."""
         size = radius * 2 + 1, radius * 2 + 1
         sun = pygame.Surface(size)
         mask = pygame.Surface(size)
@@ -72,19 +115,13 @@ class Sunset(State):
             mask, "white", (radius, radius), radius,
         )
         # Removing bands
-        y = 9
-        s = 3
-        while y < size[1]:
-            pygame.gfxdraw.hline(mask, 0, size[1], y, (0, 0, 0))
-            y += 9
-            # s += 1
-
-        # Defining the color of the sun
-        color = top
-        for y in range(0, size[1]):
-            if y % 9 == 0:
-                color = utils.mix(top, bottom, y / size[1])
-            pygame.gfxdraw.hline(sun, 0, size[1], y, color)
+        for y in range(9, size[1], 9):
+            mask.fill((0, 0, 0), (0, y, size[0], 1))
+
+        # Defining the color of the sun, which changes every 9 rows
+        for y in range(0, size[1], 9):
+            color = utils.mix(top, bottom, y / size[1])
+            sun.fill(color, (0, y, size[0], 9))
 
         sun.blit(mask, (0, 0), special_flags=pygame.BLEND_MULT)
         sun.set_colorkey(0)
@@ -92,13 +129,19 @@ class Sunset(State):
         return sun
 
     def draw_rays(self, gfx, center, color=SUN_BOTTOM):
+        # All the rays are drawn as a single polygon that goes back to the
+        # center after each ray. The rays don't overlap, so it looks the same.
+        cx, cy = center
+        points = []
         for angle in range(0, 360, 10):
             angle += self.timer / 7
             span = 5
-            p1 = center + utils.from_polar(1000, angle - span / 2)
-            p2 = center + utils.from_polar(1000, angle + span / 2)
-            points = [center, p1, p2]
-            pygame.gfxdraw.filled_polygon(gfx.surf, points, color)
+            a1 = radians(angle - span / 2)
+            a2 = radians(angle + span / 2)
+            p1 = cx + 1000 * cos(a1), cy + 1000 * sin(a1)
+            p2 = cx + 1000 * cos(a2), cy + 1000 * sin(a2)
+            points += ((cx, cy), p1, p2)
+        pygame.gfxdraw.filled_polygon(gfx.surf, points, color)
 
     def logic(self):
         super().logic()
@@ -106,19 +149,17 @@ class Sunset(State):
 
     def draw(self, gfx: "GFX"):
 
-        for y in range(0, H // 2, band_height):
-            color = utils.mix(SKY_TOP, SKY_END, y / H * 2)
-            gfx.surf.fill(color, (0, y, W, band_height))
+        gfx.surf.blit(self.sky, (0, 0))
 
         self.particles.draw(gfx)
 
         # Sun rays and sun
         self.draw_rays(gfx, infinity, SUN_BOTTOM + (50,))
-        gfx.blit(self.draw_sun(54), center=infinity)
+        gfx.blit(self.sun, center=infinity)
         # Second sun
         other = (W, -15)
         self.draw_rays(gfx, other, SUN_TOP + (30,))
-        gfx.blit(self.draw_sun(4 * 9, SUN_TOP, SUN_TOP), center=other)
+        gfx.blit(self.second_sun, center=other)
 
         second_half = pygame.Rect(0, H / 2, W, H / 2)
         gfx.surf.fill(BG_COLOR, second_half)
@@ -135,41 +176,19 @@ class Sunset(State):
         pygame.gfxdraw.hline(gfx.surf, 0, W, H // 2, LINES)
 
         # Vertical lines
-        n_lines = 17
-        for n in range(n_lines):
-            n = utils.chrange(n, (0, n_lines - 1), (-pi / 2, pi / 2))
-            angle = utils.chrange(sin(n), (-1, 1), (0, pi))
-
-            x = infinity[0] + 1000 * cos(angle)
-            y = infinity[1] + 1000 * sin(angle)
-
-            line = second_half.clipline(x, y, *infinity)
-            if line:
-                pygame.draw.line(gfx.surf, LINES, *line)
-            # pygame.draw.line(gfx.surf, LINES, infinity, (x, y))
+        for start, end in self.vertical_lines:
+            pygame.draw.line(gfx.surf, LINES, start, end)
 
         # self.particles.draw(gfx.surf)
 
         super(Sunset, self).draw(gfx)
 
         if "DRAW MENU":
-            margin = 30
-            menu_rect = pygame.Rect(
-                W / 2 + margin, margin, W / 2 - 2 * margin, H - margin * 2
-            )
-            menu_rect.midright = W - margin, H / 2
-            pygame.gfxdraw.box(gfx.surf, menu_rect, (0, 0, 0, 125))
-            pygame.draw.rect(gfx.surf, utils.mix(SUN_TOP, SUN_BOTTOM, 0.5), menu_rect, 1)
+            gfx.blit(self.menu, topleft=self.menu_rect.topleft)
 
         # signature
-        sig = assets.image("ByCozyFractal").copy()
-        sig.fill(LINES, special_flags=pygame.BLEND_ADD)
-        pygame.gfxdraw.box(
-            gfx.surf,
-            sig.get_rect(bottomleft=(4, H - 2)).inflate(8, 4),
-            BG_COLOR + (200,),
-        )
-        gfx.blit(sig, bottomleft=(4, H - 2))
+        gfx.blit(self.signature_bg, topleft=self.signature_bg_rect.topleft)
+        gfx.blit(self.signature, bottomleft=(4, H - 2))
 
 
 class Bird(Object):
@@ -177,8 +196,16 @@ class Bird(Object):
         super().__init__(pos)
 
         self.flip = flip
-        self.anim = Animation("bird idle", flip)
-        self.scripts.add(self.script())
+        self.anims: dict[str, Animation] = {}
+        self.anim = self.animation("bird idle")
+
+    def animation(self, name):
+        """The animation with the given name, restarted from its first frame."""
+        anim = self.anims.get(name)
+        if anim is None:
+            anim = self.anims[name] = Animation(name, self.flip)
+        anim.timer = 0
+        return anim
 
     def script(self):
         while True:
@@ -192,16 +219,16 @@ class Bird(Object):
                 yield
 
     def pick(self):
-        self.anim = Animation("bird pick", self.flip)
+        self.anim = self.animation("bird pick")
 
         for _ in rrange(1.3):
             for _ in range(len(self.anim)):
                 yield
 
-        self.anim = Animation("bird idle", self.flip)
+        self.anim = self.animation("bird idle")
 
     def fly(self):
-        self.anim = Animation("bird fly", self.flip)
+        self.anim = self.animation("bird fly")
 
         start_pos = pygame.Vector2(self.pos)
         angle = 0 if self.flip else 180
@@ -209,7 +236,7 @@ class Bird(Object):
         screen = pygame.Rect(0, 0, W, H).inflate(32, 32)
         while screen.collidepoint(*self.pos):
             angle += uniform(-1, 1) * 3
-            self.pos += utils.from_polar(speed, angle)
+            self.pos += speed * cos(radians(angle)), speed * sin(radians(angle))
             yield
 
         for _ in range(int(gauss(6 * 60, 60))):
@@ -223,7 +250,7 @@ class Bird(Object):
             yield
 
         self.pos = start_pos
-        self.anim = Animation("bird idle", self.flip)
+        self.anim = self.animation("bird idle")
 
     def logic(self):
         super().logic()
@@ -261,7 +288,9 @@ class Boid:
 
     @angle.setter
     def angle(self, value):
-        self.vel.from_polar((self.vel.length(), value))
+        length = self.vel.length()
+        value = radians(value)
+        self.vel.update(length * cos(value), length * sin(value))
 
     @property
     def speed(self):
@@ -271,20 +300,10 @@ class Boid:
     def speed(self, value):
         self.vel.scale_to_length(value)
 
-    def flockmates(self, all_boids: "SpaceHash", dist):
-        x, y = self.grid(all_boids.case_size)
-        return [
-            boid
-            for boid in all_boids.neighbors(x, y)
-            if boid.pos.distance_to(self.pos) < dist and boid is not self
-        ]
-
     def logic(self, all_boids: "SpaceHash"):
         acc = pygame.Vector2()
 
-        acc += self.avoid(all_boids)
-        acc += self.align(all_boids)
-        acc += self.cohesion(all_boids)
+        acc += self.flock(all_boids)
         acc += self.walls()
 
         self.acc = acc
@@ -293,41 +312,62 @@ class Boid:
             self.speed = self.max_speed
         self.pos += self.vel
 
-    def avoid(self, all_boids):
-        # Assuming there is only one boid
-
-        force = pygame.Vector2()
-        for boid in self.flockmates(all_boids, self.AVOID_RADIUS):
-            dist = self.pos.distance_to(boid.pos)
-            force += (self.pos - boid.pos) / dist ** 2
-
-        return force * self.AVOID_STRENGTH
-
-    def align(self, all_boids):
-        alignment = self.flockmates(all_boids, self.ALIGN_RADIUS)
-        if not alignment:
+    def flock(self, all_boids: "SpaceHash"):
+        """Steering from the avoid, align and cohesion rules, in one pass over the neighbors."""
+
+        # Plain floats and squared distances, as this runs for every pair of close boids.
+        avoid_r2 = self.AVOID_RADIUS ** 2
+        align_r2 = self.ALIGN_RADIUS ** 2
+        cohesion_r2 = self.COHESION_RADIUS ** 2
+        x = self.pos.x
+        y = self.pos.y
+
+        avoid_x = avoid_y = 0.0
+        nb_avoid = 0
+        vel_x = vel_y = 0.0
+        nb_align = 0
+        pos_x = pos_y = 0.0
+        nb_cohesion = 0
+
+        for boid in all_boids.neighbors(*self.grid(all_boids.case_size)):
+            if boid is self:
+                continue
+            pos = boid.pos
+            dx = x - pos.x
+            dy = y - pos.y
+            d2 = dx * dx + dy * dy
+            if d2 < avoid_r2:
+                avoid_x += dx / d2
+                avoid_y += dy / d2
+                nb_avoid += 1
+            if d2 < align_r2:
+                vel = boid.vel
+                vel_x += vel.x
+                vel_y += vel.y
+                nb_align += 1
+            if d2 < cohesion_r2:
+                pos_x += pos.x
+                pos_y += pos.y
+                nb_cohesion += 1
+
+        if not (nb_avoid or nb_align or nb_cohesion):
+            # No other boid is close enough for any rule.
             return pygame.Vector2()
 
-        avg_vel = sum((b.vel for b in alignment), start=pygame.Vector2())
-        avg_vel.scale_to_length(self.max_speed)
-        steering = avg_vel - self.vel
+        steering = pygame.Vector2(avoid_x, avoid_y) * self.AVOID_STRENGTH
 
-        return steering * self.ALIGN_STRENGTH
+        if nb_align:
+            avg_vel = pygame.Vector2(vel_x, vel_y)
+            avg_vel.scale_to_length(self.max_speed)
+            steering += (avg_vel - self.vel) * self.ALIGN_STRENGTH
 
-    def cohesion(self, all_boids):
-        cohesion = self.flockmates(all_boids, self.COHESION_RADIUS)
-        if not cohesion:
-            return pygame.Vector2()
-
-        center_of_mass = sum((b.pos for b in cohesion), start=pygame.Vector2()) / len(
-            cohesion
-        )
-        vec_to_center = center_of_mass - self.pos
-        if vec_to_center:
-            vec_to_center.scale_to_length(self.max_speed)
-        steering = vec_to_center - self.vel
+        if nb_cohesion:
+            vec_to_center = pygame.Vector2(pos_x / nb_cohesion - x, pos_y / nb_cohesion - y)
+            if vec_to_center:
+                vec_to_center.scale_to_length(self.max_speed)
+            steering += (vec_to_center - self.vel) * self.COHESION_STRENGTH
 
-        return steering * self.COHESION_STRENGTH
+        return steering
 
     def walls(self):
         distances = [*self.pos, *(self.PLAY_RECT.bottomright - self.pos)]
@@ -361,25 +401,46 @@ class Boid:
         return (self.pos.x // case_size, self.pos.y // case_size)
 
 
-class SpaceHash(defaultdict):
+class SpaceHash:
+    """Boids binned in a flat grid of cells that covers the play area.
+
+    Boids can go a bit outside of the play area, so the grid has a margin
+    of a few cells. Boids further away go to the closest cell on the border.
+    """
+
+    MARGIN = 4
+
     def __init__(self, boids, case_size):
-        super().__init__(list)
         self.case_size = case_size
+        self.cols = int(Boid.PLAY_RECT.width // case_size) + 1 + 2 * self.MARGIN
+        self.rows = int(Boid.PLAY_RECT.height // case_size) + 1 + 2 * self.MARGIN
+        self.cells = [[] for _ in range(self.cols * self.rows)]
 
         for boid in boids:
-            pos = boid.grid(case_size)
-            self[pos].append(boid)
+            x, y = self.clamp(*boid.grid(case_size))
+            self.cells[y * self.cols + x].append(boid)
+
+    def clamp(self, x, y):
+        """Index of the column and row of the cell at grid coordinates (x, y)."""
+        x = min(max(int(x) + self.MARGIN, 0), self.cols - 1)
+        y = min(max(int(y) + self.MARGIN, 0), self.rows - 1)
+        return x, y
 
     def neighbors(self, x, y):
-        for dx in range(-1, 2):
-            for dy in range(-1, 2):
-                yield from iter(self[x + dx, y + dy])
+        x, y = self.clamp(x, y)
+        cells = self.cells
+        for cy in range(max(y - 1, 0), min(y + 2, self.rows)):
+            row = cy * self.cols
+            for cx in range(max(x - 1, 0), min(x + 2, self.cols)):
+                yield from cells[row + cx]
 
 
 class Boids(Object):
     def __init__(self, n_boids=300):
         super().__init__((0, 0))
         self.boids = [Boid((uniform(0, W), uniform(0, H / 2))) for _ in range(n_boids)]
+        self.dot = pygame.Surface((2, 2))
+        self.dot.fill(BG_COLOR)
 
     def logic(self):
         case_size = max(Boid.ALIGN_RADIUS, Boid.AVOID_RADIUS, Boid.COHESION_RADIUS) / 2
@@ -389,8 +450,8 @@ class Boids(Object):
             boid.logic(spatial_hash)
 
     def draw(self, gfx):
-        for boid in self.boids:
-            pygame.draw.rect(gfx.surf, BG_COLOR, (boid.pos, (2, 2)))
+        dot = self.dot
+        gfx.fblits([(dot, boid.pos) for boid in self.boids])
 
         for b in self.boids[:0]:
             pygame.draw.circle(gfx.surf, "red", b.pos, b.AVOID_RADIUS, 1)
@@ -31,16 +31,83 @@ __all__ = ["GFX", "WrapGFX", "CameraGFX"]
 
 
 class GFX:
+    """Draw on a surface, with optional world transformations in subclasses.
+
+    Blits are not done right away: they are queued and sent to pygame in a
+    single Surface.blits() call when the queue is flushed. This happens at the
+    end of the frame, or as soon as something accesses .surf, which every
+    other draw method does. So, until then, a blitted surface must not be
+    modified (filled, set_alpha()...), or the change shows up on screen.
+    Access gfx.surf or call .flush() first if you need to modify it.
+    """
 
     def __init__(self, surf: pygame.Surface):
-        self.surf = surf
+        self._surf = surf
+        self._w, self._h = surf.get_size()
         self.force_ui = False
+        # Whether a subclass transforms coordinates. If not, hot paths skip .edit_pos().
+        self._edits_pos = type(self).edit_pos is not GFX.edit_pos
+        # Reused by .rect(), which is called a lot by the debug overlay.
+        self._scratch_rect = Rect(0, 0, 0, 0)
+        # Blits are queued and sent to pygame in one .blits() call.
+        self._blit_queue: list[tuple[pygame.Surface, Rect]] = []
+        # Pre-filled surfaces for the transparent rects, by (w, h, color).
+        self._rect_cache: dict[tuple, pygame.Surface] = {}
+
+    @property
+    def surf(self) -> pygame.Surface:
+        """The underlying surface. Pending blits are flushed before it is handed out."""
+        if self._blit_queue:
+            self.flush()
+        return self._surf
+
+    @surf.setter
+    def surf(self, value: pygame.Surface):
+        self.flush()
+        self._surf = value
+        self._w, self._h = value.get_size()
+
+    def rebind(self, surf: pygame.Surface):
+        """Draw on a new surface (e.g. after a resize), keeping the rest of the GFX state."""
+        self.surf = surf
 
     def blit(self, surf, ui: bool = False, **anchor):
-        """Blit a surface directly on the underlying surface, coordinates are in pixels."""
+        """Blit a surface directly on the underlying surface, coordinates are in pixels.
+
+        The blit is queued and only done on the next call to .flush(), or whenever
+        something else is drawn, so that the order of draw calls is preserved.
+        The surface must not be modified until then, see the class docstring.
+        """
         r = surf.get_rect(**self.edit_anchor(anchor, ui))
-        self.surf.blit(surf, r)
-        return r
+        self._blit_queue.append((surf, r))
+        # A copy, so that changing the returned rect doesn't move the queued blit.
+        return r.copy()
+
+    def blit_at(self, surf, anchor: str, pos: Vec2Like, ui: bool = False):
+        """Same as .blit(), with the anchor passed positionally: gfx.blit_at(img, "center", pos).
+
+        Prefer it in code that runs for every sprite, as it avoids building a kwargs dict.
+        """
+        r = surf.get_rect()
+        setattr(r, anchor, self.edit_pos(pos, ui) if self._edits_pos else pos)
+        self._blit_queue.append((surf, r))
+        return r.copy()
+
+    def fblits(self, blit_sequence, ui: bool = False, special_flags: int = 0):
+        """Blit many (surface, topleft) pairs at once, with a single call to Surface.fblits().
+
+        Faster than .blit() for many small surfaces, like particles, but the rects are not returned.
+        """
+        if self._edits_pos and not (ui or self.force_ui):
+            edit_pos = self.edit_pos
+            blit_sequence = [(surf, edit_pos(pos)) for surf, pos in blit_sequence]
+        self.surf.fblits(blit_sequence, special_flags)
+
+    def flush(self):
+        """Do all the pending blits. Called by the App before each flip."""
+        if self._blit_queue:
+            self._surf.blits(self._blit_queue, doreturn=0)
+            self._blit_queue.clear()
 
     # Draw functions
 
@@ -59,19 +126,42 @@ class GFX:
     def rect(self, color: ColorValue, x, y, w, h, width=0, anchor: str = None, ui: bool = False):
         """Draw a rectangle in world coordinates. Does not support alpha for width != 0."""
         x, y = self.edit_pos((x, y), ui)
-        r = pygame.Rect(x, y, w, h)
+        r = self._scratch_rect
+        r.update(x, y, w, h)
 
         if anchor:
             setattr(r, anchor, (x, y))
 
         if width == 0:
-            pygame.gfxdraw.box(self.surf, r, color)
+            if r.w <= 0 or r.h <= 0:
+                # gfxdraw has its own handling of empty and negative rects.
+                pygame.gfxdraw.box(self.surf, r, color)
+            else:
+                # Any color value, like "#ff000080", can have alpha.
+                # Tuples and Colors are checked directly, to not build a Color on each call.
+                if not (isinstance(color, (tuple, pygame.Color)) and len(color) in (3, 4)):
+                    color = pygame.Color(color)
+                if len(color) == 4 and color[3] < 255:
+                    self._transparent_rect(color, r)
+                else:
+                    self.surf.fill(color, r)
         else:
             pygame.draw.rect(self.surf, color, r, width)
 
         # Note that this might not be useful, especially when the position is edited.
         # It might make sense only for ui=True.
-        return r
+        return r.copy()
+
+    def _transparent_rect(self, color, r: Rect):
+        key = (r.w, r.h, tuple(color))
+        surf = self._rect_cache.get(key)
+        if surf is None:
+            if len(self._rect_cache) > 256:
+                self._rect_cache.clear()
+            surf = self._rect_cache[key] = pygame.Surface(r.size, pygame.SRCALPHA)
+            surf.fill(color)
+        # Not queued, as r is the scratch rect.
+        self.surf.blit(surf, r)
 
     def box(self, color: ColorValue, rect: RectValue, ui: bool = False):
         """Draw a filled rectangle in world coordinates. Supports alpha."""
@@ -86,7 +176,8 @@ class GFX:
         ui: bool = False,
     ):
         """Draw a polygon in world coordinates. Does not support alpha for width != 0."""
-        points = [self.edit_pos(p, ui) for p in points]
+        if self._edits_pos:
+            points = [self.edit_pos(p, ui) for p in points]
         if width == 0:
             pygame.gfxdraw.filled_polygon(self.surf, points, color)
         else:
@@ -215,11 +306,11 @@ class CameraGFX(GFX):
     @property
     def world_center(self) -> Vector2:
         """Set the world coordinates that are in the center of the screen."""
-        return -self.translation + pygame.Vector2(self.surf.get_size()) / 2
+        return Vector2(self._w / 2 - self.translation.x, self._h / 2 - self.translation.y)
 
     @world_center.setter
     def world_center(self, pos: Vec2Like):
-        self.translation = (-pygame.Vector2(pos) + pygame.Vector2(self.surf.get_size()) / 2)
+        self.translation = Vector2(self._w / 2 - pos[0], self._h / 2 - pos[1])
 
     def edit_pos(self, pos: Vec2Like, ui: bool = False):
         if ui or self.force_ui:
@@ -231,10 +322,7 @@ class WrapGFX(GFX):
 
     def edit_pos(self, pos: Vec2Like, ui: bool = False):
         """Return position so that it is on screen as if the screen was a torus."""
-        # We need to copy here, modifying in place might affect the user
         if ui or self.force_ui:
             return pos
-        pos = Vector2(pos)
-        pos.x %= self.surf.get_width()
-        pos.y %= self.surf.get_height()
-        return pos
+        # A new tuple, so the user's vector is not modified and no Vector2 is allocated.
+        return pos[0] % self._w, pos[1] % self._h
@@ -1,3 +1,7 @@
+import heapq
+from functools import lru_cache
+from itertools import count
+from random import randrange
 from typing import Optional, Tuple, TYPE_CHECKING, Generator, Callable
 
 import pygame
@@ -6,7 +10,7 @@ from .assets import rotate
 from .constants import GREEN, RED, UPWARDS
 from .gfx import GFX
 from .particles import TextParticle
-from .utils import overlay, random_in_rect, random_rainbow_color
+from .utils import overlay, random_in_rect
 
 if TYPE_CHECKING:
     from . import State
@@ -14,6 +18,35 @@ if TYPE_CHECKING:
 __all__ = ["Object", "Entity", "SpriteObject", "Scriptable"]
 
 
+def _rainbow_color(hue):
+    color = pygame.Color(0)
+    color.hsva = hue, 80, 100, 100
+    return color
+
+
+# Same colors as random_rainbow_color(80), one per hue, for the debug color of each object.
+_RAINBOW = [_rainbow_color(hue) for hue in range(360)]
+
+
+@lru_cache(1000)
+def _red_overlay(image: pygame.Surface) -> pygame.Surface:
+    # Keyed by the surface itself, so that entities sharing a rotated sprite share the overlay too.
+    return overlay(image, RED)
+
+
+class _Waiting:
+    """Yielded by .wait_until(), so that the script is not resumed until the condition is met."""
+
+    __slots__ = ("condition",)
+
+    def __init__(self, condition: Callable[[], bool]):
+        self.condition = condition
+
+
+# Tie-breaker for timers due on the same frame, so that functions are never compared.
+_timer_ids = count()
+
+
 class Scriptable:
     """Base class of most game objects.
 
@@ -25,23 +58,43 @@ class Scriptable:
     A new script can be added to run in parallel of the other
     with .add_script().
 
+    .scripts only holds the scripts that run this frame: the ones waiting
+    in .wait_until() and the .do_later() calls are kept aside.
+    Use .has_scripts() to know whether anything is still pending.
+
     Objects, but also States are Scriptable.
     """
 
+    __slots__ = ("scripts", "scripts_to_add", "script_add_lock", "_frame", "_timers", "_waiting")
+
     def __init__(self):
         super().__init__()
-        self.scripts = set()
+        self.scripts: list[Generator] = []
         # To allow scripts to add other scripts
-        self.scripts_to_add = set()
+        self.scripts_to_add: list[Generator] = []
         self.script_add_lock = False
+        # Number of calls to .logic(), and a heap of (frame, id, function) for .do_later().
+        self._frame = 0
+        self._timers: list[tuple[int, int, Callable[[], None]]] = []
+        # Scripts paused in .wait_until(), with their condition.
+        self._waiting: list[tuple[Callable[[], bool], Generator]] = []
 
-        self.add_script(self.script())
+        # The default script does nothing, no need to run it.
+        if type(self).script is not Scriptable.script:
+            self.add_script(self.script())
 
     def add_script(self, generator: Generator):
         if self.script_add_lock:
-            self.scripts_to_add.add(generator)
+            self.scripts_to_add.append(generator)
         else:
-            self.scripts.add(generator)
+            self.scripts.append(generator)
+
+    def has_scripts(self) -> bool:
+        """Whether any script, waiting script or .do_later() call is still pending.
+
+        Use this rather than testing .scripts, which does not hold them all.
+        """
+        return bool(self.scripts or self.scripts_to_add or self._waiting or self._timers)
 
     def add_script_decorator(self, function):
         self.add_script(function())
@@ -49,16 +102,44 @@ class Scriptable:
     def logic(self):
         """Call the next frame of each script."""
 
-        to_remove = set()
+        self._frame += 1
+        scripts = self.scripts
+
+        # Waiting scripts are only resumed once their condition is met.
+        if self._waiting:
+            still_waiting = []
+            for condition, script in self._waiting:
+                if condition():
+                    scripts.append(script)
+                else:
+                    still_waiting.append((condition, script))
+            self._waiting = still_waiting
+
         self.script_add_lock = True
-        for script in self.scripts:
+        i = 0
+        while i < len(scripts):
             try:
-                next(script)
+                value = next(scripts[i])
             except StopIteration:
-                to_remove.add(script)
-        self.scripts.difference_update(to_remove)
+                # Swap-remove: the order of scripts is not guaranteed.
+                scripts[i] = scripts[-1]
+                scripts.pop()
+                continue
+
+            if value is not None and value.__class__ is _Waiting:
+                self._waiting.append((value.condition, scripts[i]))
+                scripts[i] = scripts[-1]
+                scripts.pop()
+            else:
+                i += 1
         self.script_add_lock = False
-        self.scripts.update(self.scripts_to_add)
+        if self.scripts_to_add:
+            scripts.extend(self.scripts_to_add)
+            self.scripts_to_add.clear()
+
+        timers = self._timers
+        while timers and timers[0][0] <= self._frame:
+            heapq.heappop(timers)[2]()
 
     def do_later(self, nb_of_frames):
         """Decorator to automatically call a function :nb_of_frames: later.
@@ -76,25 +157,27 @@ class Scriptable:
         """
 
         def decorator(func):
-
-            def script():
-                yield from range(nb_of_frames)
-                func()
-
-            self.add_script(script())
+            # Same frame as a script doing `yield from range(nb_of_frames)` before calling func.
+            due = self._frame + nb_of_frames + 1
+            heapq.heappush(self._timers, (due, next(_timer_ids), func))
             return func
 
         return decorator
 
     def wait_until(self, condition: Callable[[], bool]) -> Generator:
-        """Script that wait and does nothing until the condition is met."""
+        """Script that wait and does nothing until the condition is met.
+
+        While waiting, the script is not resumed, only the condition is checked each frame.
+        """
         while not condition():
-            yield
+            yield _Waiting(condition)
 
     def script(self):
         """Script must be a generator where each yield will correspond to a frame.
 
+        Override it to add a script to the object, it is started automatically.
         Useful to implement sequential logics.
+        Other scripts/generators can be added with .add_script()
         """
         yield
 
@@ -104,6 +187,9 @@ class Scriptable:
 class Object(Scriptable):
     """Base class for everything in the game world."""
 
+    # Subclasses that don't define __slots__ get a regular __dict__ back.
+    __slots__ = ("pos", "size", "vel", "alive", "state", "_random_color")
+
     Z = 0  # Z-Index to determine in which order to draw objects.
 
     def __init__(self, pos, size=(1, 1), vel=(0, 0)):
@@ -116,23 +202,15 @@ class Object(Scriptable):
         self.state: Optional["State"] = None
 
         # A (likely) unique color per object, that can be used for debugging
-        self._random_color = random_rainbow_color(80)
-
-        self.add_script(self.script())
+        # Shared with other objects, not to be modified.
+        self._random_color = _RAINBOW[randrange(360)]
 
     def __str__(self):
         return f"{self.__class__.__name__}(at {self.pos})"
 
-    def script(self):
-        """Override this generator to add a script to the objects.
-
-        Other scripts/generators can be added with .add_script()"""
-        yield
-
     def wait_until_dead(self):
         """Script that wait and does nothing while the object is alive."""
-        while self.alive:
-            yield
+        yield from self.wait_until(lambda: not self.alive)
 
     @property
     def center(self):
@@ -154,10 +232,15 @@ class Object(Scriptable):
 
         super().logic()
 
-        self.pos += self.vel
+        # Most objects (UI, debug, static props) never move.
+        if self.vel:
+            self.pos += self.vel
 
-        self.state.debug.rectangle(self.rect, self._random_color)
-        self.state.debug.vector(self.vel * 10, self.center, self._random_color)
+        debug = self.state.debug
+        # Checked here to skip building the rect and vectors when they are not drawn.
+        if debug.enabled:
+            debug.rectangle(self.rect, self._random_color)
+            debug.vector(self.vel * 10, self.center, self._random_color)
 
     def draw(self, gfx: GFX):
         """Override this to draw the object on the screen every frame."""
@@ -183,11 +266,16 @@ class Object(Scriptable):
 
 
 class SpriteObject(Object):
+    __slots__ = ("base_image", "image_offset", "rotation", "opacity", "_cached_image", "_cached_key")
+
     # SpriteObjects are automatically scaled by this amount.
     # It is not meant to be changed at runtime.
     SCALE = 1
     # The direction that the sprite is facing in its source image.
     INITIAL_ROTATION = UPWARDS
+    # Rotations are rounded to a multiple of this many degrees, so that sprites
+    # share fewer rotated images. For instance 360 / 16 for 16 directions.
+    ROTATION_STEP = 1
 
     def __init__(
             self,
@@ -212,8 +300,11 @@ class SpriteObject(Object):
         """
 
         if self.SCALE > 1:
-            image = pygame.transform.scale(
-                image, (self.SCALE * image.get_width(), self.SCALE * image.get_height()))
+            if self.SCALE == int(self.SCALE):
+                image = pygame.transform.scale_by(image, int(self.SCALE))
+            else:
+                image = pygame.transform.scale(
+                    image, (self.SCALE * image.get_width(), self.SCALE * image.get_height()))
         if size is None:
             size = image.get_size()
 
@@ -221,6 +312,9 @@ class SpriteObject(Object):
         self.image_offset = pygame.Vector2(offset)
         self.rotation = rotation
         self.opacity = 255
+        # Last image returned by .image, with its (base_image, rotation, opacity).
+        self._cached_image: Optional[pygame.Surface] = None
+        self._cached_key = (None, None, None)
 
         super().__init__(pos, size, vel)
 
@@ -234,25 +328,45 @@ class SpriteObject(Object):
 
     @property
     def image(self):
-        img = rotate(self.base_image, int(self.rotation))
-        img.set_alpha(self.opacity)
-        return img
+        step = self.ROTATION_STEP
+        if step == 1:
+            rotation = int(self.rotation)
+        else:
+            rotation = round(self.rotation / step) * step
+        key = (self.base_image, rotation, self.opacity)
+        if key != self._cached_key:
+            img = rotate(self.base_image, key[1])
+            if key[2] != 255:
+                # The rotated image is shared with other sprites, so we can't change its alpha.
+                img = img.copy()
+                img.set_alpha(key[2])
+            self._cached_image = img
+            self._cached_key = key
+        return self._cached_image
 
     def draw(self, gfx: "GFX"):
         super().draw(gfx)
-        gfx.blit(self.image, center=self.sprite_center)
+        gfx.blit_at(self.image, "center", self.sprite_center)
 
     @property
     def sprite_center(self):
         """Position of the center of the sprite, in world coordinates."""
-        return (self.pos + self.image_offset * self.SCALE +
-                pygame.Vector2(self.base_image.get_size()) / 2)
+        # Component-wise, to build only the returned vector.
+        w, h = self.base_image.get_size()
+        pos = self.pos
+        offset = self.image_offset
+        return pygame.Vector2(
+            pos.x + offset.x * self.SCALE + w / 2,
+            pos.y + offset.y * self.SCALE + h / 2,
+        )
 
     def sprite_to_screen(self, pos):
         """Convert a position in the sprite to its world coordinates."""
-        pos = (
-            pygame.Vector2(pos) + (0.5, 0.5)  # To get the center of the pixel
-            - pygame.Vector2(self.base_image.get_size()) / 2 / self.SCALE)
+        w, h = self.base_image.get_size()
+        pos = pygame.Vector2(
+            pos[0] + 0.5 - w / 2 / self.SCALE,  # +0.5 to get the center of the pixel
+            pos[1] + 0.5 - h / 2 / self.SCALE,
+        )
         pos.rotate_ip(-self.rotation)
         pos *= self.SCALE
         r = self.sprite_center + pos
@@ -266,6 +380,8 @@ class SpriteObject(Object):
 class Entity(SpriteObject):
     """An object with health and a sprite."""
 
+    __slots__ = ("max_life", "life", "last_hit", "_flash_red", "_visible")
+
     INVICIBILITY_DURATION = 0
     INITIAL_LIFE = 1000
 
@@ -282,6 +398,9 @@ class Entity(SpriteObject):
         self.max_life = self.INITIAL_LIFE
         self.life = self.INITIAL_LIFE
         self.last_hit = 100000000
+        # How the entity is drawn this frame, updated with last_hit.
+        self._flash_red = False
+        self._visible = True
 
     def heal(self, amount):
         if self.life + amount > self.max_life:
@@ -317,6 +436,8 @@ class Entity(SpriteObject):
         # amount *= gauss(1, 0.1)
 
         self.last_hit = 0
+        self._flash_red = True
+        self._visible = True
 
         self.life -= amount
         if self.life < 0:
@@ -341,19 +462,20 @@ class Entity(SpriteObject):
         super().logic()
 
         self.last_hit += 1
+        last_hit = self.last_hit
+        self._flash_red = last_hit < 3
+        # Blinks while invincible.
+        self._visible = last_hit >= self.INVICIBILITY_DURATION or last_hit % 6 <= 3
 
         if self.life <= 0:
             self.alive = False
 
     def draw(self, gfx):
-        if self.last_hit < 3:
-            gfx.surf.blit(
-                overlay(self.image, RED),
-                self.image.get_rect(center=self.sprite_center),
-            )
+        if self._flash_red:
+            gfx.blit_at(_red_overlay(self.image), "center", self.sprite_center)
             return
 
-        if self.invincible and self.last_hit % 6 > 3:
+        if not self._visible:
             return  # no blit
 
         super().draw(gfx)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from math import cos, pi, sin
 from random import choice, gauss, randint, uniform
 from time import time
@@ -26,7 +27,7 @@ __all__ = [
 ]
 
 from .assets import text
-from .utils import bounce, exp_impulse, random_in_rect, random_in_rect_and_avoid, rrange, clamp, from_polar
+from .utils import bounce, exp_impulse, random_in_rect, random_in_rect_and_avoid, rrange, clamp, from_polar, from_polar_xy
 from .gfx import GFX
 
 
@@ -51,7 +52,7 @@ def rand2d(vec):
     return uniform(0, vec[0]), uniform(0, vec[1])
 
 
-class ParticleSystem(set):
+class ParticleSystem(list):
     fountains: "list[ParticleFountain]"
 
     def __init__(self):
@@ -59,19 +60,25 @@ class ParticleSystem(set):
         self.fountains = []
         self.use_gfx = True  # Change to False for slightly better performance
 
+    def add(self, particle: "Particle"):
+        """Add a particle to the system. Particles are drawn in the order they were added."""
+        self.append(particle)
+
     def logic(self):
         """Update all the particle for the frame."""
 
         for fountain in self.fountains:
             fountain.logic(self)
 
-        dead = set()
+        any_dead = False
         for particle in self:
             particle.logic()
             if not particle.alive:
-                dead.add(particle)
+                any_dead = True
 
-        self.difference_update(dead)
+        # Compacting once is faster than removing the dead particles one by one.
+        if any_dead:
+            self[:] = [particle for particle in self if particle.alive]
 
     def draw(self, gfx: GFX):
         """Draw all the particles"""
@@ -301,19 +308,26 @@ class Particle:
             """Make the particle bounce on the sides, inside the rectangle."""
 
             rect = pygame.Rect(rect)
+            left, top, right, bottom = rect.left, rect.top, rect.right, rect.bottom
 
             def bounce_rect(particle):
-                angle = particle.angle % 360
-                if particle.pos.x - particle.size < rect.left and 90 < angle < 270:
-                    particle.angle = 180 - angle
-                elif particle.pos.x + particle.size > rect.right and (angle < 90 or angle > 270):
-                    particle.angle = 180 - angle
-
-                angle = particle.angle % 360
-                if particle.pos.y - particle.size < rect.top and angle > 180:
-                    particle.angle = -angle
-                elif particle.pos.y + particle.size > rect.bottom and angle < 180:
-                    particle.angle = -angle
+                x, y = particle.pos
+                size = particle.size
+
+                # Most of the time, the particle is far from the sides and the angle is not needed.
+                if x - size < left or x + size > right:
+                    angle = particle.angle % 360
+                    if x - size < left and 90 < angle < 270:
+                        particle.angle = 180 - angle
+                    elif x + size > right and (angle < 90 or angle > 270):
+                        particle.angle = 180 - angle
+
+                if y - size < top or y + size > bottom:
+                    angle = particle.angle % 360
+                    if y - size < top and angle > 180:
+                        particle.angle = -angle
+                    elif y + size > bottom and angle < 180:
+                        particle.angle = -angle
 
             return self.anim(bounce_rect)
 
@@ -365,7 +379,9 @@ class Particle:
             cos(self.angle * radians) * self.speed,
             sin(self.angle * radians) * self.speed,
         )
-        self.pos += self.constant_force
+        # Most particles have no constant force.
+        if self.constant_force:
+            self.pos += self.constant_force
 
         self.inner_rotation += self.inner_rotation_speed
 
@@ -382,6 +398,24 @@ class Particle:
         raise NotImplementedError(f"Particle {self} does not implement draw_no_gfx()")
 
 
+@lru_cache(64)
+def _hsv_gradient(h0, s0, v0, h1, v1, s1) -> tuple[tuple[int, int, int, int], ...]:
+    """The hsva colors of anim_gradient_to(), for 256 steps of the particle's life.
+
+    Cached, as the same gradient is usually given to many particles.
+    """
+    gradient = []
+    for i in range(256):
+        t = i / 255
+        p = 1 - t
+
+        h = int(p * h0 + t * h1) % 360
+        s = int(100 * (p * s0 + t * s1))
+        v = int(100 * (p * v0 + t * v1))
+        gradient.append((h, s, v, 100))
+    return tuple(gradient)
+
+
 class DrawnParticle(Particle):
     def __init__(self, color=None):
         self.color = pygame.Color(color or 0)
@@ -414,15 +448,10 @@ class DrawnParticle(Particle):
             # s1 = clamp(s) * 100 if s is not None else s0
             # v1 = clamp(v) * 100 if v is not None else v0
 
-            def gradient_to(particle):
-                p = 1 - particle.life_prop
-                t = particle.life_prop
+            gradient = _hsv_gradient(h0, s0, v0, h1, v1, s1)
 
-                h = int(p * h0 + t * h1) % 360
-                s = int(100 * (p * s0 + t * s1))
-                v = int(100 * (p * v0 + t * v1))
-                r = h, s, v, 100
-                particle.color.hsva = r
+            def gradient_to(particle):
+                particle.color.hsva = gradient[int(particle.life_prop * 255)]
 
             return self.anim(gradient_to)
 
@@ -431,17 +460,38 @@ class DrawnParticle(Particle):
         return self.Builder(self)
 
 
+@lru_cache(256)
+def _circle_surface(color: tuple, radius: int) -> pygame.Surface:
+    """A translucent filled circle, the same as gfxdraw.filled_circle() would draw."""
+    surf = pygame.Surface((2 * radius + 1, 2 * radius + 1), pygame.SRCALPHA)
+    pygame.gfxdraw.filled_circle(surf, radius, radius, radius, color[:3])
+    surf.set_alpha(color[3])
+    return surf
+
+
 class CircleParticle(DrawnParticle):
+    # Above this radius, translucent circles are blitted from a cached surface,
+    # as gfxdraw gets slow. Even making a new surface is faster than drawing the circle.
+    SPRITE_MIN_RADIUS = 10
+
     def __init__(self, color=None, filled=True):
         super().__init__(color)
         self.filled = filled
 
     def draw(self, gfx: GFX):
-        gfx.circle(self.color, self.pos, self.size, 1 - self.filled)
+        radius = int(self.size)
+        if self.filled and self.color.a < 255 and radius >= self.SPRITE_MIN_RADIUS:
+            gfx.blit_at(_circle_surface(tuple(self.color), radius), "center", self.pos)
+        else:
+            gfx.circle(self.color, self.pos, self.size, 1 - self.filled)
 
     def draw_no_gfx(self, surf):
         if self.color.a < 255:
-            if self.filled:
+            radius = int(self.size)
+            if self.filled and radius >= self.SPRITE_MIN_RADIUS:
+                pos = (int(self.pos.x) - radius, int(self.pos.y) - radius)
+                surf.blit(_circle_surface(tuple(self.color), radius), pos)
+            elif self.filled:
                 pygame.gfxdraw.filled_circle(
                     surf, int(self.pos.x), int(self.pos.y), int(self.size), self.color
                 )
@@ -464,6 +514,12 @@ class SquareParticle(DrawnParticle):
             pygame.draw.rect(surf, self.color, (pos, (self.size, self.size)))
 
 
+@lru_cache(256)
+def _polygon_directions(vertices: int, vertex_step: int, rotation: float):
+    """Unit vectors from the center to the vertices of a PolygonParticle, in drawing order."""
+    return [from_polar_xy(1, rotation + i * 360 / vertices * vertex_step) for i in range(vertices)]
+
+
 class PolygonParticle(DrawnParticle):
     def __init__(self, vertices: int, color=None, vertex_step: int = 1):
         """
@@ -482,23 +538,23 @@ class PolygonParticle(DrawnParticle):
         self.vertex_step = vertex_step
         self.vertices = vertices
 
-    def draw(self, gfx: GFX):
-        points = [
-            self.pos
-            + from_polar(self.size, self.inner_rotation + i * 360 / self.vertices * self.vertex_step, )
-            for i in range(self.vertices)
-        ]
+    def points(self):
+        args = (self.vertices, self.vertex_step, self.inner_rotation)
+        if self.inner_rotation_speed:
+            # A new rotation every frame, caching would only fill the cache.
+            directions = _polygon_directions.__wrapped__(*args)
+        else:
+            directions = _polygon_directions(*args)
 
-        gfx.polygon(self.color, points)
+        x, y = self.pos
+        size = self.size
+        return [(x + size * dx, y + size * dy) for dx, dy in directions]
 
-    def draw_no_gfx(self, surf):
-        points = [
-            self.pos
-            + from_polar(self.size, self.inner_rotation + i * 360 / self.vertices * self.vertex_step, )
-            for i in range(self.vertices)
-        ]
+    def draw(self, gfx: GFX):
+        gfx.polygon(self.color, self.points())
 
-        pygame.gfxdraw.filled_polygon(surf, points, self.color)
+    def draw_no_gfx(self, surf):
+        pygame.gfxdraw.filled_polygon(surf, self.points(), self.color)
 
 
 class ShardParticle(DrawnParticle):
@@ -539,12 +595,15 @@ class LineParticle(DrawnParticle):
         self.width = width
         super().__init__(color)
 
+    def end(self):
+        dx, dy = from_polar_xy(self.length, self.angle)
+        return self.pos.x - dx, self.pos.y - dy
+
     def draw(self, gfx: GFX):
-        end = self.pos - from_polar(self.length, self.angle)
-        gfx.line(self.color, self.pos, end)
+        gfx.line(self.color, self.pos, self.end())
 
     def draw_no_gfx(self, surf):
-        end = vec2int(self.pos - from_polar(self.length, self.angle))
+        end = vec2int(self.end())
         start = vec2int(self.pos)
         # noinspection PyTypeChecker
         pygame.gfxdraw.line(surf, *start, *end, self.color)
@@ -583,7 +642,7 @@ class ImageParticle(Particle):
         if self.need_redraw:
             self.surf = self.redraw()
 
-        gfx.blit(self.surf, center=self.pos)
+        gfx.blit_at(self.surf, "center", self.pos)
 
     def draw_no_gfx(self, surf: pygame.Surface):
         if self.need_redraw:
@@ -826,6 +885,7 @@ def main():
         s = DEFAULT_FONT.render(
             f"FPS: {clock.get_fps():.2f}  Particles: {len(particles)}", True, "white"
         )
+        gfx.flush()
         display.blit(s, (5, 5))
 
         pygame.display.update()
@@ -528,7 +528,8 @@ class Inputs(dict, Dict[str, Union[Button, Axis]]):
         """Trigger all callbacks when needed"""
 
         # make sure we can iterate it multiple times
-        events = list(events)
+        if not isinstance(events, list):
+            events = list(events)
         for inp in self.values():
             inp.actualise(events)
 
@@ -28,7 +28,7 @@ class Title(Object):
         self.text_surf = surf
         self.shown_image = pygame.Surface((0, 0))
         super().__init__(rect.topleft, surf.get_size())
-        self.scripts = {getattr(self, animation)()}
+        self.scripts = [getattr(self, animation)()]
 
     def enlarge(self):
         widen_frames = 40
@@ -84,7 +84,7 @@ class Title(Object):
     def logic(self):
         super().logic()
 
-        if not self.scripts:
+        if not self.has_scripts():
             self.alive = False
 
     def draw(self, gfx: GFX):
@@ -26,7 +26,9 @@ class StateTransition(State):
         """Get the screen that the next state would draw."""
 
         next_surface = pygame.Surface(gfx.surf.get_size())
-        self.next.draw(GFX(next_surface))
+        next_gfx = GFX(next_surface)
+        self.next.draw(next_gfx)
+        next_gfx.flush()
         return next_surface
 
     def logic(self):